@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import pandas as pd
+from processing_functions import BACKENDS, prepare_data, get_conversation_stats, get_stats_per_user, explode_reactions, activity_timeline_stats, summarize_conversation
+
+#
+#   Side-by-side benchmark of the processing backends. Every stage is timed for each backend (best of --repeat runs)
+#   and the results of the backends are compared with the pandas ones. The conversation summary is also checked on a copy of the
+#   conversation with all reactions removed, as many threads of a real inbox have none.
+#   Usage: python benchmark_backends.py "facebook-data/messages/inbox/conversation_folder" --repeat 5
+#
+
+STAGES = [
+            ("prepare_data", None),
+            ("get_conversation_stats", get_conversation_stats),
+            ("get_stats_per_user", get_stats_per_user),
+            ("explode_reactions", explode_reactions),
+            ("activity_timeline_stats", activity_timeline_stats),
+            ("summarize_conversation", summarize_conversation)
+         ]
+
+
+NO_REACTIONS_STAGE = "summarize_conversation (no reactions)"
+
+
+def strip_reactions(path, output_path):
+
+    #
+    #   Copy the json files of the conversation without the reactions key in any message.
+    #   Input: path to the conversation folder, path to an existing folder for the copy
+    #
+
+    for f in [pos_json for pos_json in os.listdir(path) if pos_json.endswith('.json')]:
+        with open(os.path.join(path, f), encoding='utf-8') as file:
+            conversation = json.load(file)
+        for message in conversation['messages']:
+            message.pop('reactions', None)
+        with open(os.path.join(output_path, f), 'w', encoding='utf-8') as file:
+            json.dump(conversation, file)
+
+
+def best_time(function, repeat):
+
+    #
+    #   Run the function repeat times.
+    #   Output: tuple (best wall time in seconds, result of the last run)
+    #
+
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def same_result(expected, result):
+
+    #
+    #   Compare the result of a stage with the pandas one. Reaction tables are compared as plain records, as their type differs between backends.
+    #
+
+    if isinstance(expected, pd.DataFrame):
+        if not isinstance(result, pd.DataFrame):
+            result = pd.DataFrame({col: result[col].to_numpy() for col in result.columns})
+        try:
+            pd.testing.assert_frame_equal(expected.reset_index(drop=True), result.reset_index(drop=True), check_dtype=False)
+        except AssertionError:
+            return False
+        return True
+
+    return expected == result
+
+
+def run_benchmark(path, backends, repeat):
+
+    timings = {}
+    results = {}
+
+    with tempfile.TemporaryDirectory() as no_reactions_path:
+        strip_reactions(path, no_reactions_path)
+
+        for backend in backends:
+            timings[backend], results[backend] = {}, {}
+            timings[backend]["prepare_data"], df = best_time(lambda: prepare_data(path, backend=backend), repeat)
+
+            for stage, function in STAGES[1:]:
+                timings[backend][stage], results[backend][stage] = best_time(lambda: function(df), repeat)
+
+            timings[backend][NO_REACTIONS_STAGE], results[backend][NO_REACTIONS_STAGE] = best_time(
+                lambda: summarize_conversation(prepare_data(no_reactions_path, backend=backend)), repeat)
+
+    header = "{:<40}".format("stage") + "".join("{:>12}".format(backend) for backend in backends) + "  same result"
+    print(header)
+    print("-" * len(header))
+
+    for stage in [stage for stage, _ in STAGES] + [NO_REACTIONS_STAGE]:
+        line = "{:<40}".format(stage) + "".join("{:>11.4f}s".format(timings[backend][stage]) for backend in backends)
+        if stage in results[backends[0]]:
+            same = all(same_result(results[backends[0]][stage], results[backend][stage]) for backend in backends[1:])
+            line += "  {}".format("yes" if same else "NO")
+        print(line)
+
+    print("{:<40}".format("total") + "".join("{:>11.4f}s".format(sum(timings[backend].values())) for backend in backends))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Compare the execution backends of the processing layer.")
+    parser.add_argument("path", help="path to the conversation folder with message_*.json files")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS), help="backends to compare, the first one is the reference")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs of every stage, the best time is reported (default: 3)")
+    args = parser.parse_args()
+
+    run_benchmark(args.path, args.backends, args.repeat)
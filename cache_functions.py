@@ -0,0 +1,213 @@
+import os
+import hashlib
+import shutil
+import numpy as np
+from PIL import Image
+
+#
+#   Content-addressed cache of rendered images (charts, word clouds, text images).
+#   Every entry is a PNG file named after the hash of the data and styling parameters used to render it, so an unchanged
+#   conversation (or an unchanged section of it) is copied from the cache instead of being rendered again.
+#   The cache is configured with environment variables, so worker processes share the configuration of the parent:
+#       FB_ANALYZER_CACHE_DIR     - cache directory (default: .render_cache), an empty value disables the cache
+#       FB_ANALYZER_CACHE_MAX_MB  - size limit of the cache in megabytes (default: 64), least recently used entries are evicted first
+#
+
+DEFAULT_CACHE_DIR = ".render_cache"
+DEFAULT_CACHE_MAX_MB = 64
+
+
+def cache_dir():
+
+    #
+    #   Output: path to the cache directory or None if the cache is disabled
+    #
+
+    path = os.environ.get("FB_ANALYZER_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+    return path if path else None
+
+
+def cache_max_bytes():
+
+    #
+    #   Output: size limit of the cache in bytes
+    #
+
+    return int(float(os.environ.get("FB_ANALYZER_CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB)) * 1024 * 1024)
+
+
+def render_key(name, version, *parts):
+
+    #
+    #   Build the cache key of a rendered image.
+    #   Input: name of the renderer (unique across modules), its version (see RENDER_VERSIONS of the rendering modules) and all the data
+    #          and styling parameters which affect the image (strings, numbers, numpy arrays or lists/tuples of them). Styling hard-coded
+    #          in the renderer is covered by its version, which is bumped whenever the rendering code changes.
+    #   Output: hex digest identifying the image
+    #
+
+    digest = hashlib.sha256("{}@{}".format(name, version).encode('utf-8'))
+
+    def update(part):
+        if isinstance(part, np.ndarray):
+            digest.update("ndarray{}{}".format(part.dtype.str, part.shape).encode('utf-8'))
+            if part.dtype == object:
+                for item in part:
+                    update(item)
+            else:
+                digest.update(np.ascontiguousarray(part).tobytes())
+        elif isinstance(part, (list, tuple)):
+            digest.update("list{}".format(len(part)).encode('utf-8'))
+            for item in part:
+                update(item)
+        elif isinstance(part, bytes):
+            digest.update("bytes{}".format(len(part)).encode('utf-8'))
+            digest.update(part)
+        else:
+            text = part if isinstance(part, str) else repr(part)
+            encoded = text.encode('utf-8')
+            digest.update("{}{}".format(type(part).__name__, len(encoded)).encode('utf-8'))
+            digest.update(encoded)
+
+    for part in parts:
+        update(part)
+
+    return digest.hexdigest()
+
+
+def file_signature(path):
+
+    #
+    #   Cheap fingerprint of an input file (e.g. the word cloud mask) which does not require reading it.
+    #   Input: path to the file
+    #   Output: tuple (absolute path, size, modification time)
+    #
+
+    stat = os.stat(path)
+
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def cache_entry_path(key):
+
+    return os.path.join(cache_dir(), key + ".png")
+
+
+def cache_lookup(key, output_path):
+
+    #
+    #   Copy the cached image to the output path.
+    #   Input: cache key, path where the image is expected
+    #   Output: True if the image was found in the cache, False otherwise
+    #
+
+    if cache_dir() is None:
+        return False
+
+    entry = cache_entry_path(key)
+
+    try:
+        shutil.copyfile(entry, output_path)
+        os.utime(entry)
+    except FileNotFoundError:
+        return False
+
+    return True
+
+
+def cache_store(key, output_path):
+
+    #
+    #   Put a freshly rendered image into the cache and evict old entries if the cache got too big.
+    #   Input: cache key, path of the rendered image
+    #
+
+    if cache_dir() is None:
+        return
+
+    os.makedirs(cache_dir(), exist_ok=True)
+    entry = cache_entry_path(key)
+    temp_entry = "{}.{}.tmp".format(entry, os.getpid())
+
+    # Copy and rename, so concurrent readers never see a half written entry
+    shutil.copyfile(output_path, temp_entry)
+    os.replace(temp_entry, entry)
+
+    evict_cache()
+
+
+def load_cached_image(key):
+
+    #
+    #   Input: cache key
+    #   Output: PIL Image from the cache or None if it is not cached
+    #
+
+    if cache_dir() is None:
+        return None
+
+    entry = cache_entry_path(key)
+
+    try:
+        with Image.open(entry) as img:
+            img.load()
+            result = img.copy()
+        os.utime(entry)
+    except FileNotFoundError:
+        return None
+
+    return result
+
+
+def store_cached_image(key, img):
+
+    #
+    #   Put a rendered PIL Image into the cache.
+    #   Input: cache key, PIL Image
+    #
+
+    if cache_dir() is None:
+        return
+
+    os.makedirs(cache_dir(), exist_ok=True)
+    entry = cache_entry_path(key)
+    temp_entry = "{}.{}.tmp".format(entry, os.getpid())
+
+    img.save(temp_entry, "PNG")
+    os.replace(temp_entry, entry)
+
+    evict_cache()
+
+
+def evict_cache(max_bytes=None):
+
+    #
+    #   Remove the least recently used entries until the cache fits into its size limit.
+    #   Input: size limit in bytes (default: FB_ANALYZER_CACHE_MAX_MB)
+    #
+
+    if cache_dir() is None:
+        return
+
+    max_bytes = cache_max_bytes() if max_bytes is None else max_bytes
+    entries = []
+
+    for entry in os.scandir(cache_dir()):
+        if entry.name.endswith(".png"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+    total_size = sum(size for _, size, _ in entries)
+
+    for _, size, path in sorted(entries):
+        if total_size <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
@@ -0,0 +1,150 @@
+import time
+
+START_TIME = time.perf_counter()
+
+import argparse
+import os
+import sys
+
+# Kept in sync with processing_functions.BACKENDS, which is not imported here to keep the start-up fast
+BACKENDS = ("pandas", "polars")
+
+
+def print_startup_time(name):
+
+    #
+    #   Report how long it took to get from the interpreter start to the point where the subcommand is ready to work.
+    #   Input: name of the subcommand
+    #
+
+    print("{} ready in {:.2f}s".format(name, time.perf_counter() - START_TIME), file=sys.stderr)
+
+
+def run_stats(args):
+
+    #
+    #   Print conversation statistics, per user statistics and badges. Only pandas and numpy are imported here.
+    #   Input: parsed command line arguments
+    #
+
+    from processing_functions import prepare_data, get_conversation_stats, get_stats_per_user, get_badges
+
+    print_startup_time("stats")
+
+    df = prepare_data(args.path, backend=args.backend)
+    stats = get_conversation_stats(df)
+    user_stats = get_stats_per_user(df)
+    badges = get_badges(user_stats)
+
+    for key, value in stats.items():
+        print("{}: {}".format(key, value))
+
+    print()
+    print(user_stats.to_string())
+    print()
+
+    for badge, performers in badges.items():
+        print("{}: {}".format(badge, ", ".join(performers)))
+
+
+def run_inbox(args):
+
+    #
+    #   Print statistics of all conversations in the inbox. Conversations are summarized in parallel and the summaries are merged.
+    #   Input: parsed command line arguments
+    #
+
+    from processing_functions import summarize_inbox, get_inbox_stats
+
+    print_startup_time("inbox")
+
+    path_to_stopwords = None if args.no_words else args.stopwords
+    summary = summarize_inbox(args.path, path_to_stopwords=path_to_stopwords, max_workers=args.workers, backend=args.backend)
+    stats = get_inbox_stats(summary, n=args.top)
+
+    for key, value in stats.items():
+        print("{}: {}".format(key, value))
+
+
+def run_report(args):
+
+    #
+    #   Build the PDF report of the conversation. Plotly, wordcloud, NLTK and FPDF are loaded only for this subcommand.
+    #   Input: parsed command line arguments
+    #
+
+    from processing_functions import prepare_data, get_conversation_stats, get_stats_per_user, get_badges, tokenize_messages, prepare_word_freq_distribution
+    from plot_functions import distribution_pie, generate_wordcloud
+    from pdf_builder_functions import create_main_page, add_scorecard_pages
+
+    print_startup_time("report")
+
+    if args.no_cache:
+        os.environ["FB_ANALYZER_CACHE_DIR"] = ""
+
+    os.makedirs("figures", exist_ok=True)
+
+    df = prepare_data(args.path, backend=args.backend)
+    stats = get_conversation_stats(df)
+    user_stats = get_stats_per_user(df)
+    badges = get_badges(user_stats)
+
+    tokens = tokenize_messages(df, path_to_stopwords=args.stopwords)
+    most_common = prepare_word_freq_distribution(tokens, n=1).most_common(5)
+
+    distribution_pie(df)
+    generate_wordcloud(tokens, path_to_mask=args.mask)
+
+    title = args.title if args.title else os.path.basename(os.path.normpath(args.path))
+    pdf = create_main_page(stats, most_common, badges, title)
+
+    if not args.no_scorecards:
+        add_scorecard_pages(pdf, df, user_stats, path_to_stopwords=args.stopwords, max_workers=args.workers)
+
+    pdf.output(args.output)
+
+    print("Report saved to {}".format(args.output))
+
+
+def build_parser():
+
+    parser = argparse.ArgumentParser(prog="fb-analyzer", description="Get insights into your fb messenger conversations.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stats_parser = subparsers.add_parser("stats", help="print conversation statistics")
+    stats_parser.add_argument("path", help="path to the conversation folder with message_*.json files")
+    stats_parser.add_argument("--backend", choices=BACKENDS, default="pandas", help="execution backend of the processing layer (default: pandas)")
+    stats_parser.set_defaults(func=run_stats)
+
+    inbox_parser = subparsers.add_parser("inbox", help="print statistics of all conversations in the inbox")
+    inbox_parser.add_argument("path", help="path to the inbox folder with conversation folders")
+    inbox_parser.add_argument("-n", "--top", type=int, default=10, help="number of top contacts, reaction givers and words (default: 10)")
+    inbox_parser.add_argument("-j", "--workers", type=int, default=None, help="number of processes summarizing conversations (default: number of CPUs)")
+    inbox_parser.add_argument("--stopwords", default="resources/pl_stopwords.txt", help="path to the stopwords file")
+    inbox_parser.add_argument("--no-words", action="store_true", help="skip word counts, which need NLTK and are the slowest part")
+    inbox_parser.add_argument("--backend", choices=BACKENDS, default="pandas", help="execution backend of the processing layer (default: pandas)")
+    inbox_parser.set_defaults(func=run_inbox)
+
+    report_parser = subparsers.add_parser("report", help="build the PDF report")
+    report_parser.add_argument("path", help="path to the conversation folder with message_*.json files")
+    report_parser.add_argument("-o", "--output", default="report.pdf", help="output PDF file (default: report.pdf)")
+    report_parser.add_argument("-t", "--title", default=None, help="conversation title (default: name of the conversation folder)")
+    report_parser.add_argument("--stopwords", default="resources/pl_stopwords.txt", help="path to the stopwords file")
+    report_parser.add_argument("--mask", default="resources/mask.npy", help="path to the word cloud mask")
+    report_parser.add_argument("--no-scorecards", action="store_true", help="build only the main page, without per-participant scorecards")
+    report_parser.add_argument("-j", "--workers", type=int, default=None, help="number of processes rendering the scorecards (default: number of CPUs)")
+    report_parser.add_argument("--no-cache", action="store_true", help="render all charts from scratch instead of using the render cache")
+    report_parser.add_argument("--backend", choices=BACKENDS, default="pandas", help="execution backend of the processing layer (default: pandas)")
+    report_parser.set_defaults(func=run_report)
+
+    return parser
+
+
+def main(argv=None):
+
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,18 @@
 from fpdf import FPDF
 from PIL import Image, ImageDraw, ImageFont
 import textwrap
+import hashlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+from cache_functions import render_key, load_cached_image, store_cached_image
+from plot_functions import plot_monthly_messages
+from processing_functions import tokenize_messages, prepare_word_freq_distribution, select_user_messages
+
+# Versions of the renderers, part of their render cache keys, see plot_functions.RENDER_VERSIONS
+RENDER_VERSIONS = {
+                    "create_transparent_image_with_text" : 1
+                  }
+
 
 def create_transparent_image_with_text(width, height, text, linewidth):
     """
@@ -19,9 +31,15 @@ def create_transparent_image_with_text(width, height, text, linewidth):
         This function creates a new transparent image with the specified dimensions and then places the provided
         text at the center of the image. The text is wrapped into multiple lines based on the specified line width.
         The function adjusts the font size to ensure that the entire text fits within the image. The resulting
-        image with the centered text is returned.
+        image with the centered text is returned. Rendered images are kept in the render cache (see cache_functions), so
+        the same text in the same bounding box is rendered only once.
     """
 
+    key = render_key("pdf_builder_functions.create_transparent_image_with_text", RENDER_VERSIONS["create_transparent_image_with_text"], width, height, text, linewidth)
+    cached_img = load_cached_image(key)
+    if cached_img is not None:
+        return cached_img
+
     img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
     
     # Get a drawing context
@@ -63,6 +81,8 @@ def create_transparent_image_with_text(width, height, text, linewidth):
         draw.text((x_offset , y + y_offset), line, fill=(255, 255, 255, 255), font=font) 
         y_offset += line_height
 
+    store_cached_image(key, img)
+
     return img
 
 
@@ -259,4 +279,209 @@ def create_main_page(stats, most_common, badges, conversation_title):
     pdf.set_xy(x = 16, y = 10)
     pdf.cell(w = 142, h = 17, txt = conversation_title, border=0, align="C", fill=False)
 
-    return pdf
\ No newline at end of file
+    return pdf
+
+
+def scorecard_file_prefix(user):
+
+    """
+    Builds a file name prefix for the scorecard images of a participant which is safe to use in a path.
+
+    Args:
+        user (str): The name of the participant.
+
+    Returns:
+        str: The name with every character other than letters, digits, "-" and "_" replaced by "_", followed by a short hash of
+        the original name, so two names which differ only in such characters do not share their images.
+    """
+
+    safe_name = re.sub(r'[^\w\-]+', '_', user, flags=re.ASCII).strip('_')
+    name_hash = hashlib.sha1(user.encode('utf-8')).hexdigest()[:10]
+
+    return "{}_{}".format(safe_name, name_hash)
+
+
+def prepare_scorecard_assets(user, user_messages, user_row, path_to_stopwords='resources/pl_stopwords.txt'):
+
+    """
+    Renders the images and computes the word statistics needed for the scorecard page of a single participant.
+
+    Args:
+        user (str): The name of the participant.
+        user_messages (pandas.DataFrame): Messages sent by the participant, in a form as created by prepare_data().
+        user_row (dict): The row of the participant from the DataFrame returned by get_stats_per_user().
+        path_to_stopwords (str): A path to the stopwords text file.
+
+    Returns:
+        dict: Paths of the rendered images together with the statistics printed on the page.
+
+    Description:
+        This is the expensive part of a scorecard: the monthly messages chart, the first message image and the
+        tokenization of all user messages. It only takes picklable arguments and returns a picklable dict, so it can run
+        in a worker process. The page itself is laid out later by `add_scorecard_page`.
+    """
+
+    file_prefix = scorecard_file_prefix(user)
+
+    monthly_messages_plot_path = "figures/{}_monthly.png".format(file_prefix)
+    plot_monthly_messages(user_messages, monthly_messages_plot_path)
+
+    first_message_image_path = "figures/{}_first_message.png".format(file_prefix)
+    first_message_image = create_transparent_image_with_text(700, 120, user_row['first_message'], 120)
+    first_message_image.save(first_message_image_path, "PNG")
+
+    tokens = tokenize_messages(user_messages, path_to_stopwords=path_to_stopwords)
+
+    assets = {
+                "monthly_messages_plot_path" : monthly_messages_plot_path,
+                "first_message_image_path" : first_message_image_path,
+                "most_busy_day" : user_row['most_busy_day'],
+                "messages_on_busy_day" : user_row['messgaes_on_most_busy_day'],
+                "total_messages" : user_row['total_messages'],
+                "total_obtained_reactions" : user_row['total_reactions'],
+                "most_reactions_from" : user_row['most_emotional_user'],
+                "favourite_messenger" : user_row['favourite_user_to_give_to'],
+                "most_common_words" : prepare_word_freq_distribution(tokens, n=1).most_common(10),
+                "most_common_bigrams" : prepare_word_freq_distribution(tokens, n=2).most_common(5)
+             }
+
+    return assets
+
+
+def add_user_name_cell(pdf, text, x_single, x_double):
+
+    """
+    Prints a user name in one of the scorecard icon slots, splitting the first and the last name into two lines.
+
+    Args:
+        pdf (FPDF): The PDF document.
+        text (str): The user name, "-" is printed when it is missing (e.g. the participant never reacted).
+        x_single (float): X coordinate of the cell when the name has one or more than two words.
+        x_double (float): X coordinate of the cells when the name has exactly two words.
+    """
+
+    text = remove_polish_characters(text) if text else "-"
+    splitted_text = text.split()
+
+    if len(splitted_text) < 2:
+        pdf.set_xy(x = x_single, y = 175)
+        pdf.cell(w = 30, h = 5, txt = text, border=0, align="C", fill=False)
+
+    elif len(splitted_text) == 2:
+        pdf.set_xy(x = x_double, y = 170)
+        pdf.cell(w = 30, h = 5, txt = splitted_text[0], border=0, align="C", fill=False)
+
+        pdf.set_xy(x = x_double, y = 180)
+        pdf.cell(w = 30, h = 5, txt = splitted_text[1], border=0, align="C", fill=False)
+
+    else:
+        pdf.set_xy(x = x_single, y = 175)
+        pdf.cell(w = 30, h = 5, txt = splitted_text[0], border=0, align="C", fill=False)
+
+
+def add_scorecard_page(pdf, user, assets):
+
+    """
+    Adds the scorecard page of a single participant to the PDF document.
+
+    Args:
+        pdf (FPDF): The PDF document, e.g. the one returned by create_main_page().
+        user (str): The name of the participant.
+        assets (dict): Images and statistics prepared by prepare_scorecard_assets().
+
+    Description:
+        The page is laid out on top of templates/template_scorecard.png: the title with the user name, the first message,
+        the monthly messages chart, the most busy day, messages and reactions counts, the user who reacted the most to
+        the participant messages, the user the participant reacted to the most, top 10 words and top 5 bigrams.
+    """
+
+    pdf.add_page()
+    pdf.image('templates/template_scorecard.png', x = 0, y = 0, w = 297, h = 210)
+    pdf.image(assets["monthly_messages_plot_path"], x = 10, y = 50, w = 180, h = 90)
+    pdf.image(assets["first_message_image_path"], x = 58, y = 43, w = 100, h = 15)
+
+    # Most busy day summary
+    pdf.set_font('helvetica', 'B', 14)
+    pdf.set_text_color(33, 131, 128)
+
+    pdf.set_xy(x = 55, y = 138)
+    pdf.cell(w = 25, h = 10, txt = str(assets["most_busy_day"]), border=0, align="C", fill=False)
+
+    pdf.set_xy(x = 116, y = 138)
+    pdf.cell(w = 25, h = 10, txt = str(assets["messages_on_busy_day"]), border=0, align="C", fill=False)
+
+    # Descriptive stats bottom section
+    pdf.set_font('helvetica', 'B', 22)
+    pdf.set_text_color(1, 178, 255)
+
+    pdf.set_xy(x = 10, y = 175)
+    pdf.cell(w = 40, h = 5, txt = str(assets["total_messages"]), border=0, align="C", fill=False)
+
+    pdf.set_xy(x = 65, y = 175)
+    pdf.cell(w = 30, h = 5, txt = str(assets["total_obtained_reactions"]), border=0, align="C", fill=False)
+
+    pdf.set_font('helvetica', 'B', 16)
+    pdf.set_text_color(1, 178, 255)
+
+    add_user_name_cell(pdf, assets["most_reactions_from"], x_single = 105, x_double = 112)
+    add_user_name_cell(pdf, assets["favourite_messenger"], x_single = 155, x_double = 155)
+
+    # Top 10 words
+    pdf.set_font('helvetica', 'B', 14)
+    pdf.set_text_color(33, 131, 128)
+
+    for w, (word, frequency) in enumerate(assets["most_common_words"]):
+        text = str(w + 1) + ". " + remove_polish_characters(word) + " - " + str(frequency)
+        coord_x = 204 if w < 5 else 246
+        coord_y = 40 + w*11 if w < 5 else 40 + (w-5)*11
+        pdf.set_xy(x = coord_x, y = coord_y)
+        pdf.cell(w = 25, h = 10, txt = text, border=0, align="L", fill=False)
+
+    # Bigrams
+    for b, (bigram, frequency) in enumerate(assets["most_common_bigrams"]):
+        text = remove_polish_characters(bigram[0]) + " " + remove_polish_characters(bigram[1]) + " - " + str(frequency)
+        pdf.set_xy(x = 213, y = 132 + b*11.5)
+        pdf.cell(w = 50, h = 8, txt = text, border=0, align="L", fill=False)
+
+    # Title
+    pdf.set_font('helvetica', 'B', 32)
+    pdf.set_text_color(33, 131, 128)
+
+    pdf.set_xy(x = 25, y = 9)
+    pdf.cell(w = 100, h = 20, txt = remove_polish_characters(user), border=0, align="C", fill=False)
+
+
+def add_scorecard_pages(pdf, df, user_stats, path_to_stopwords='resources/pl_stopwords.txt', max_workers=None):
+
+    """
+    Adds a scorecard page for every participant to the PDF document, rendering the pages in parallel.
+
+    Args:
+        pdf (FPDF): The PDF document, e.g. the one returned by create_main_page().
+        df (pandas.DataFrame): The conversation in a form as created by prepare_data().
+        user_stats (pandas.DataFrame): Per user statistics returned by get_stats_per_user().
+        path_to_stopwords (str): A path to the stopwords text file.
+        max_workers (int): Number of worker processes (default: number of CPUs). With 1 everything runs in this process.
+
+    Returns:
+        FPDF: The same PDF document with the scorecard pages appended.
+
+    Description:
+        Charts, first message images and word statistics of all participants are prepared concurrently in a process pool
+        with `prepare_scorecard_assets`. Only the cheap page layout is done serially, in the order of the user_stats index,
+        so a big group report takes about as long as the slowest few scorecards instead of all of them one after another.
+    """
+
+    participants = list(user_stats.index.unique())
+    jobs = [(user, select_user_messages(df, user), user_stats.loc[user].to_dict(), path_to_stopwords) for user in participants]
+
+    if max_workers == 1:
+        all_assets = [prepare_scorecard_assets(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            all_assets = list(executor.map(prepare_scorecard_assets, *zip(*jobs)))
+
+    for user, assets in zip(participants, all_assets):
+        add_scorecard_page(pdf, user, assets)
+
+    return pdf
@@ -1,9 +1,20 @@
-import plotly.graph_objects as go
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import numpy as np
 from PIL import Image, ImageChops, ImageDraw, ImageFont
 import textwrap
+from functools import lru_cache
+from cache_functions import render_key, file_signature, cache_lookup, cache_store, load_cached_image, store_cached_image
+from processing_functions import column_as_pandas
+
+# plotly and wordcloud are heavy to import, they are loaded inside the functions which render the charts
+
+# Versions of the renderers, part of their render cache keys (namespaced with the module name). Bump the version of a renderer whenever
+# its hard-coded styling (colours, fonts, sizes, scale, trimming) changes, so the images rendered by the old code are not served any more.
+RENDER_VERSIONS = {
+                    "plot_monthly_messages" : 1,
+                    "distribution_pie" : 1,
+                    "generate_wordcloud" : 1,
+                    "create_transparent_image_with_text" : 1
+                  }
 
 
 def plot_monthly_messages(df, output_path):
@@ -14,12 +25,21 @@ def plot_monthly_messages(df, output_path):
     #   Output: Line chart in format of matplotlib figure
     #
 
+    df = column_as_pandas(df, ['month'])
+
+    # Months without messages are kept with zero counts, so the line always has a point for each of the 12 months
+    df = df.groupby(['month']).size().reindex(range(1, 13), fill_value=0).rename_axis('month').reset_index(name='counts')
+
+    key = render_key("plot_functions.plot_monthly_messages", RENDER_VERSIONS["plot_monthly_messages"], df['month'].to_numpy(), df['counts'].to_numpy(), 800, 400)
+    if cache_lookup(key, output_path):
+        return
+
+    import plotly.graph_objects as go
+
     layout = go.Layout(
     paper_bgcolor='rgba(0,0,0,0)',#'rgba(0,0,0,0)',
     plot_bgcolor='rgba(0,0,0,0)')#'rgba(0,0,0,0)')
 
-    df = df.groupby(['month']).size().reset_index(name='counts')
-
     months = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
             'August', 'September', 'October', 'November', 'December']
 
@@ -48,6 +68,7 @@ def plot_monthly_messages(df, output_path):
     
     #fig.show()
     fig.write_image(output_path, width=800, height=400)
+    cache_store(key, output_path)
 
 def distribution_pie(df):
 
@@ -57,10 +78,18 @@ def distribution_pie(df):
     #   Output: Pie chart in format of matplotlib figure
     #
 
+    df = column_as_pandas(df, ['sender_name'])
+
     labels = df['sender_name'].unique()
     counts = df['sender_name'].value_counts()
     labels = counts.index
 
+    key = render_key("plot_functions.distribution_pie", RENDER_VERSIONS["distribution_pie"], list(labels), counts.to_numpy(), 500)
+    if cache_lookup(key, "figures/pie.png"):
+        return
+
+    import plotly.graph_objects as go
+
     layout = go.Layout(
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0)')
@@ -84,6 +113,7 @@ def distribution_pie(df):
     
     #fig.show()
     fig.write_image("figures/pie.png")
+    cache_store(key, "figures/pie.png")
 
 
 
@@ -105,6 +135,21 @@ def trim(im):
     return im
 
 
+@lru_cache(maxsize=None)
+def load_mask(path_to_mask):
+
+    #
+    #   Load the word cloud mask only once per path.
+    #   Input: A path to the mask.npy file
+    #   Output: Numpy array with the mask
+    #
+
+    mask = np.load(path_to_mask)
+    mask.setflags(write=False)
+
+    return mask
+
+
 def generate_wordcloud(tokenized_text, path_to_mask='resources/mask.npy', colormap='viridis', background_color='white', max_words=100):
 
     #
@@ -112,10 +157,16 @@ def generate_wordcloud(tokenized_text, path_to_mask='resources/mask.npy', colorm
     #   Input: Python list of tokens prepared by tokenize_messages in prepocessing_utils
     #   Output: Word Cloud image 
     #
+
+    key = render_key("plot_functions.generate_wordcloud", RENDER_VERSIONS["generate_wordcloud"], list(tokenized_text), file_signature(path_to_mask), colormap, background_color, max_words)
+    if cache_lookup(key, "figures/wordcloud.png"):
+        return
+
+    from wordcloud import WordCloud
     
     text = " ".join(tokenized_text)
    
-    mask = np.load(path_to_mask)
+    mask = load_mask(path_to_mask)
 
     cloud = WordCloud(scale=3,
                       max_words=max_words,
@@ -132,6 +183,7 @@ def generate_wordcloud(tokenized_text, path_to_mask='resources/mask.npy', colorm
    # plt.axis('off')
   
     img.save("figures/wordcloud.png")
+    cache_store(key, "figures/wordcloud.png")
 
  
 
@@ -144,6 +196,10 @@ def create_transparent_image_with_text(width, height, text):
     #   Output: Image 
     #
 
+    key = render_key("plot_functions.create_transparent_image_with_text", RENDER_VERSIONS["create_transparent_image_with_text"], width, height, text, 120)
+    cached_img = load_cached_image(key)
+    if cached_img is not None:
+        return cached_img
 
     # Create a new transparent image
     img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
@@ -183,5 +239,7 @@ def create_transparent_image_with_text(width, height, text):
         x_offset = (width - text_bbox[2]) / 2
         draw.text((x_offset , y + y_offset), line, fill=(255, 255, 255, 255), font=font)
         y_offset += line_height
+
+    store_cached_image(key, img)
     
     return img
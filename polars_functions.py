@@ -0,0 +1,392 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError as e:
+    raise ImportError("The polars backend needs the polars package, install it with: pip install polars") from e
+
+from processing_functions import activity_timeline_stats, empty_summary, tokenize_messages
+
+#
+#   Polars execution backend of processing_functions, used when the conversation is loaded with prepare_data(path, backend='polars').
+#   The conversation is kept in a Polars DataFrame (Arrow memory) and groupbys, reaction explode and regex word counts run as columnar
+#   expressions in the multi-threaded Polars engine. Text is decoded before parsing by fix_mojibake(), a single-threaded NumPy pass over
+#   the bytes of every json file. The functions return the same dicts and Pandas DataFrames
+#   as their pandas counterparts in processing_functions, which dispatch here automatically. In both backends ties in "most common"
+#   rankings are broken by the first occurrence in message order (see processing_functions.most_common_value()) and the earliest day
+#   wins a tie for the most busy day.
+#
+
+MESSAGE_SCHEMA = {
+                    "sender_name" : pl.String,
+                    "timestamp_ms" : pl.Int64,
+                    "content" : pl.String,
+                    "reactions" : pl.List(pl.Struct({"reaction" : pl.String, "actor" : pl.String}))
+                 }
+
+# Python's \w: letters, digits and underscore. The \w of the Polars regex engine also matches combining marks (e.g. emoji variation selectors)
+WORD_PATTERN = r'[\p{L}\p{N}_]+'
+
+
+def hex_values(codes):
+
+    #
+    #   Values of ASCII hex digits given as a numpy uint8 array, -1 for other characters.
+    #
+
+    codes = codes.astype(np.int16)
+    values = np.full(codes.shape, -1, dtype=np.int16)
+    values = np.where((codes >= ord('0')) & (codes <= ord('9')), codes - ord('0'), values)
+    values = np.where((codes >= ord('a')) & (codes <= ord('f')), codes - ord('a') + 10, values)
+    values = np.where((codes >= ord('A')) & (codes <= ord('F')), codes - ord('A') + 10, values)
+
+    return values
+
+
+def fix_mojibake(raw):
+
+    #
+    #   Decode Polish (and all other non-ASCII) characters of a raw Facebook JSON file before it is parsed.
+    #   Facebook exports escape every byte of UTF-8 text as a separate \u00XX character. The escapes of non-ASCII bytes (\u0080 - \u00ff) are
+    #   replaced with the bytes themselves, so the JSON parser decodes the text properly. ASCII escapes are left alone, they can be quotes
+    #   or control characters. A \u00XX preceded by an odd number of backslashes is literal text (an escaped backslash followed by "u00XX")
+    #   and is left alone as well. This is the equivalent of the iso-8859-1 -> utf-8 round trip of decode_data(), done with vectorized numpy
+    #   passes over the file bytes instead of string by string.
+    #   Input: bytes of the json file
+    #   Output: bytes of the json file with UTF-8 text
+    #
+
+    data = np.frombuffer(raw, dtype=np.uint8)
+
+    if len(data) < 6:
+        return raw
+
+    n = len(data) - 5
+    high = hex_values(data[4:4 + n])
+    low = hex_values(data[5:5 + n])
+    is_escape = ((data[:n] == ord('\\')) & (data[1:1 + n] == ord('u')) & (data[2:2 + n] == ord('0')) & (data[3:3 + n] == ord('0'))
+                 & (high >= 8) & (low >= 0))
+    starts = np.flatnonzero(is_escape)
+
+    if len(starts) == 0:
+        return raw
+
+    # Number of backslashes right before every escape candidate, only an even number means the candidate really starts an escape
+    positions = np.arange(len(data))
+    last_other = np.maximum.accumulate(np.where(data != ord('\\'), positions, -1))
+    preceding_backslashes = starts - last_other[starts] - 1
+    starts = starts[preceding_backslashes % 2 == 0]
+
+    if len(starts) == 0:
+        return raw
+
+    result = data.copy()
+    result[starts] = (high[starts] * 16 + low[starts]).astype(np.uint8)
+
+    # Drop the remaining 5 characters of every escape
+    keep = np.ones(len(data), dtype=bool)
+    for offset in range(1, 6):
+        keep[starts + offset] = False
+
+    return result[keep].tobytes()
+
+
+def decode_text(text):
+
+    #
+    #   The iso-8859-1 -> utf-8 round trip of decode_data() for a single string. Raises UnicodeError for text which is not valid UTF-8.
+    #
+
+    return None if text is None else text.encode('iso-8859-1').decode('utf-8')
+
+
+def decode_columns(data):
+
+    #
+    #   Slow path of load_conversation() for conversations with text which is not valid UTF-8, decoding it the same way as the pandas backend:
+    #   sender names and messages are decoded column by column and a column which cannot be decoded as a whole is left as it is
+    #   (see processing_functions.decode_data()). Reactions which are not valid UTF-8 raise UnicodeError, as in the pandas reaction statistics.
+    #   Input: Polars DataFrame created from the json files as they are
+    #   Output: Polars DataFrame with decoded text
+    #
+
+    columns = []
+
+    for col in ['sender_name', 'content']:
+        try:
+            columns.append(pl.Series(col, [decode_text(text) for text in data[col]], dtype=pl.String))
+        except UnicodeError:
+            pass
+
+    reactions = [None if message is None else [{"reaction" : decode_text(r['reaction']), "actor" : decode_text(r['actor'])} for r in message]
+                 for message in data['reactions']]
+    columns.append(pl.Series('reactions', reactions, dtype=MESSAGE_SCHEMA['reactions']))
+
+    return data.with_columns(columns)
+
+
+def load_conversation(path):
+
+    #
+    #   Find all json files in the directory and create the Polars DataFrame containing all (already decoded) messages in the conversation.
+    #   Input: path, exmpl: "facebook-data\messages\inbox\conversation_folder"
+    #   Output: Polars DataFrame with columns: ['sender_name', 'timestamp_ms', 'content', 'reactions']
+    #
+
+    json_files = [pos_json for pos_json in os.listdir(path) if pos_json.endswith('.json')]
+    raw_files = []
+
+    for f in json_files:
+        with open(os.path.join(path, f), 'rb') as file:
+            raw_files.append(file.read())
+
+    if not raw_files:
+        return pl.DataFrame(schema=MESSAGE_SCHEMA)
+
+    try:
+        data = pl.concat([pl.from_dicts(json.loads(fix_mojibake(raw).decode('utf-8'))['messages'], schema=MESSAGE_SCHEMA) for raw in raw_files])
+    except UnicodeDecodeError:
+        data = decode_columns(pl.concat([pl.from_dicts(json.loads(raw)['messages'], schema=MESSAGE_SCHEMA) for raw in raw_files]))
+
+    # Missing content is stored as 'nan', the same as in the pandas backend, so the rest of the code can filter it the same way
+    return data.with_columns(pl.col('content').fill_null('nan'))
+
+
+def convert_timestamps(data):
+
+    #
+    #   Convert message timestamps in miliseconds into two columns: datetime format and month.
+    #   Input: Polars DataFrame
+    #   Output: Polars DataFrame with two additional columns
+    #
+
+    return data.with_columns(
+                                pl.from_epoch('timestamp_ms', time_unit='ms').alias('datetime'),
+                                pl.from_epoch('timestamp_ms', time_unit='ms').dt.month().cast(pl.Int64).alias('month')
+                            )
+
+
+def prepare_data(data_path):
+
+    #
+    #   Load and preprocess json data into a Polars DataFrame.
+    #   Input: A path to the conversation data
+    #   Output: Polars DataFrame with columns ['sender_name', 'timestamp_ms', 'content', 'reactions', 'datetime', 'month']
+    #
+
+    return convert_timestamps(load_conversation(data_path))
+
+
+def select_user_messages(df, user):
+
+    return df.filter(pl.col('sender_name') == user)
+
+
+def explode_reactions(df):
+
+    #
+    #   Flatten the reactions column into one row per reaction.
+    #   Input: Polars DataFrame created by prepare_data()
+    #   Output: Polars DataFrame with columns ['receiver', 'actor', 'reaction']
+    #
+
+    return (df.select(pl.col('sender_name').alias('receiver'), pl.col('reactions'))
+              .explode('reactions')
+              .drop_nulls('reactions')
+              .unnest('reactions')
+              .select('receiver', 'actor', 'reaction'))
+
+
+def top_per_group(df, group, value):
+
+    #
+    #   The most common value in every group, ties are broken by the first occurrence.
+    #   Input: Polars DataFrame, name of the group column, name of the value column
+    #   Output: Polars DataFrame with columns [group, value, 'count']
+    #
+
+    return (df.with_row_index('position')
+              .group_by(group, value)
+              .agg(pl.len().alias('count'), pl.col('position').min())
+              .sort([group, 'count', 'position'], descending=[False, True, False])
+              .group_by(group, maintain_order=True)
+              .agg(pl.col(value).first(), pl.col('count').first()))
+
+
+def most_common(series):
+
+    #
+    #   The most common value of a Series, ties are broken by the first occurrence. None for an empty Series.
+    #
+
+    if series.len() == 0:
+        return None
+
+    return top_per_group(series.to_frame().with_columns(pl.lit(0).alias('group')), 'group', series.name)[0, series.name]
+
+
+def received_reactions_stats(df):
+
+    reactions = explode_reactions(df)
+
+    if reactions.height == 0:
+        return {
+                "total_reactions" : 0,
+                "favourite_icon_received" : None,
+                "most_reactions_received" : ""
+               }
+
+    result = {
+                "total_reactions" : reactions.height,
+                "favourite_icon_received" : most_common(reactions['reaction']),
+                "most_reactions_received" : most_common(reactions['actor'])
+             }
+
+    return result
+
+
+def granted_reaction_stats_per_user(df):
+
+    reactions = explode_reactions(df)
+    favourite_reaction = dict(top_per_group(reactions, 'actor', 'reaction').select('actor', 'reaction').iter_rows())
+    favourite_receiver = dict(top_per_group(reactions, 'actor', 'receiver').select('actor', 'receiver').iter_rows())
+    reactions_given = dict(reactions.group_by('actor').agg(pl.len()).iter_rows())
+
+    result_dict = {}
+
+    for usr in df['sender_name'].unique(maintain_order=True):
+        result_dict[usr] = {
+                            "favourite_reaction_given" : favourite_reaction.get(usr),
+                            "favourite_user_to_give" : favourite_receiver.get(usr),
+                            "reactions_given" : reactions_given.get(usr, 0)
+                           }
+
+    return result_dict
+
+
+def get_conversation_stats(df):
+
+    reaction_stats = received_reactions_stats(df)
+    timeline_stats = activity_timeline_stats(df)
+
+    # Sorted by date, so the earliest day wins a tie, as in the pandas backend
+    messages_daily = top_per_group(df.select(pl.lit(0).alias('group'), pl.col('datetime').dt.date().alias('date')).sort('date'), 'group', 'date')
+    sorted_messages = df.filter(pl.col('content') != 'nan').sort('timestamp_ms')
+    msg_lengths = sorted_messages['content'].str.count_matches(WORD_PATTERN)
+
+    result_stats = {
+                    "total_messages" : df.height,
+                    "avg_message_length": np.round(msg_lengths.mean(), 2),
+                    "most_busy_day" : str(messages_daily[0, 'date']),
+                    "messgaes_on_most_busy_day" : messages_daily[0, 'count'],
+                    "first_message" : sorted_messages[0, 'content'],
+                    "first_message_sender" : sorted_messages[0, 'sender_name'],
+                    "total_reactions" : reaction_stats["total_reactions"],
+                    "most_common_reaction" : reaction_stats["favourite_icon_received"],
+                    "most_emotional_user" : reaction_stats["most_reactions_received"],
+                    "total_sessions" : timeline_stats["total_sessions"],
+                    "top_session_starter" : max(timeline_stats["sessions_started"], key=timeline_stats["sessions_started"].get),
+                    "longest_streak_days" : timeline_stats["longest_streak_days"]
+                   }
+    return result_stats
+
+
+def own_activity_stats(df, session_gap_minutes=60):
+
+    #
+    #   Sessions and the longest streak of active days computed for every user from their own messages only (which is what
+    #   get_conversation_stats() returns for the messages of a single user), in a single pass over the whole conversation.
+    #   Input: Polars DataFrame created by prepare_data(), idle gap (in minutes) which splits the sessions
+    #   Output: Polars DataFrame with columns ['sender_name', 'total_sessions', 'longest_streak_days']
+    #
+
+    sessions = (df.sort('sender_name', 'timestamp_ms')
+                  .group_by('sender_name', maintain_order=True)
+                  .agg((pl.col('timestamp_ms').diff().fill_null(session_gap_minutes * 60 * 1000 + 1) > session_gap_minutes * 60 * 1000).sum().alias('total_sessions')))
+
+    streaks = (df.select('sender_name', (pl.col('timestamp_ms') // (24 * 60 * 60 * 1000)).alias('day'))
+                 .unique()
+                 .sort('sender_name', 'day')
+                 .with_columns((pl.col('day').diff().over('sender_name') != 1).fill_null(True).cum_sum().alias('run'))
+                 .group_by('sender_name', 'run')
+                 .agg(pl.len().alias('run_length'))
+                 .group_by('sender_name')
+                 .agg(pl.col('run_length').max().alias('longest_streak_days')))
+
+    return sessions.join(streaks, on='sender_name')
+
+
+def get_stats_per_user(df):
+
+    #
+    #   Per user statistics computed with one groupby per statistic over the whole conversation, instead of running get_conversation_stats()
+    #   on every user separately. Output: the same Pandas DataFrame as processing_functions.get_stats_per_user().
+    #
+
+    granted_reaction_stats = granted_reaction_stats_per_user(df)
+    timeline_stats = activity_timeline_stats(df)
+
+    messages = df.filter(pl.col('content') != 'nan')
+    reactions = explode_reactions(df)
+    dates = df.select('sender_name', pl.col('datetime').dt.date().alias('date')).sort('date')
+
+    total_messages = dict(df.group_by('sender_name').agg(pl.len()).iter_rows())
+    avg_lengths = dict(messages.group_by('sender_name').agg(pl.col('content').str.count_matches(WORD_PATTERN).mean()).iter_rows())
+    busy_days = {row[0]: row[1:] for row in top_per_group(dates, 'sender_name', 'date').iter_rows()}
+    first_messages = dict(messages.sort('timestamp_ms').group_by('sender_name', maintain_order=True).agg(pl.col('content').first()).iter_rows())
+    reactions_received = dict(reactions.group_by('receiver').agg(pl.len()).iter_rows())
+    favourite_icons = dict(top_per_group(reactions, 'receiver', 'reaction').select('receiver', 'reaction').iter_rows())
+    most_emotional = dict(top_per_group(reactions, 'receiver', 'actor').select('receiver', 'actor').iter_rows())
+    own_activity = {row[0]: row[1:] for row in own_activity_stats(df).iter_rows()}
+
+    output_dict = {}
+
+    for user in df['sender_name'].unique(maintain_order=True):
+
+        user_stats = {
+                        "total_messages" : total_messages[user],
+                        "avg_message_length" : np.round(avg_lengths[user], 2) if user in avg_lengths else np.nan,
+                        "most_busy_day" : str(busy_days[user][0]),
+                        "messgaes_on_most_busy_day" : busy_days[user][1],
+                        "first_message" : first_messages.get(user),
+                        "first_message_sender" : user if user in first_messages else None,
+                        "total_reactions" : reactions_received.get(user, 0),
+                        "most_common_reaction" : favourite_icons.get(user),
+                        "most_emotional_user" : most_emotional.get(user, ""),
+                        "total_sessions" : own_activity[user][0],
+                        "longest_streak_days" : own_activity[user][1],
+                        "favourtie_reaction_given" : granted_reaction_stats[user]['favourite_reaction_given'],
+                        "favourite_user_to_give_to" : granted_reaction_stats[user]['favourite_user_to_give'],
+                        "total_reactions_given_to_others" : granted_reaction_stats[user]['reactions_given'],
+                        "median_reply_time" : timeline_stats["median_reply_time"].get(user, np.nan),
+                        "sessions_started" : timeline_stats["sessions_started"][user],
+                        "sessions_ended" : timeline_stats["sessions_ended"][user]
+                     }
+        output_dict[user] = user_stats
+
+    result = pd.DataFrame.from_dict(output_dict, orient='index')
+
+    return result[result['total_messages'] > 1]
+
+
+def summarize_conversation(df, path_to_stopwords=None):
+
+    summary = empty_summary()
+    summary["total_conversations"] = 1
+
+    # Counters are filled in the order of the first occurrence, so Counter.most_common() breaks ties the same way as for the pandas summaries
+    summary["messages_per_sender"].update(dict(df.group_by('sender_name', maintain_order=True).agg(pl.len()).iter_rows()))
+    summary["messages_per_day"].update(dict(df.group_by(pl.col('datetime').dt.strftime('%Y-%m-%d'), maintain_order=True).agg(pl.len()).iter_rows()))
+
+    reactions = explode_reactions(df)
+    summary["reactions_given"].update(dict(reactions.group_by('actor', maintain_order=True).agg(pl.len()).iter_rows()))
+    summary["reactions_received"].update(dict(reactions.group_by('receiver', maintain_order=True).agg(pl.len()).iter_rows()))
+    summary["reaction_icons"].update(dict(reactions.group_by('reaction', maintain_order=True).agg(pl.len()).iter_rows()))
+
+    if path_to_stopwords is not None:
+        summary["token_freq"].update(tokenize_messages(df, path_to_stopwords))
+
+    return summary
@@ -1,9 +1,12 @@
 import os
+import sys
 import json
 import pandas as pd
-from nltk import word_tokenize, FreqDist, bigrams, trigrams
 import numpy as np
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, reduce
 
 
 def load_conversation(path):
@@ -25,7 +28,8 @@ def load_conversation(path):
         file.close()
 
     
-    data = data[['sender_name', 'timestamp_ms', 'content', 'reactions']]     
+    # Threads without any reactions (or without any text) have no such key in the json, the missing columns are filled with NaN
+    data = data.reindex(columns=['sender_name', 'timestamp_ms', 'content', 'reactions'])
 
     return data
 
@@ -39,6 +43,8 @@ def decode_data(data):
     #
     
     for col in data.columns:
+        if col == 'reactions':
+            continue # lists of reactions are decoded per reaction by the reaction statistics
         try:
             data[col] = data[col].astype(str).str.encode('iso-8859-1').str.decode('utf-8') 
         except:
@@ -60,14 +66,52 @@ def convert_timestamps(data):
 
     return data
 
-def prepare_data(data_path):
+
+BACKENDS = ('pandas', 'polars')
+
+
+def is_polars(df):
+
+    #
+    #   Check if the conversation was prepared by the polars backend, without importing polars.
+    #   Input: DataFrame created by prepare_data()
+    #   Output: True for a Polars DataFrame, False otherwise
+    #
+
+    return type(df).__module__.startswith('polars')
+
+
+def column_as_pandas(df, columns):
+
+    #
+    #   Helper for the plotting code, which works on pandas: take only the needed columns of the conversation as a Pandas DataFrame.
+    #   Input: DataFrame created by prepare_data() with any backend, list of column names
+    #   Output: Pandas DataFrame
+    #
+
+    if is_polars(df):
+        return pd.DataFrame({col: df[col].to_numpy() for col in columns})
+
+    return df
+
+
+def prepare_data(data_path, backend='pandas'):
 
     #
     #   Wrapper function to load and preprocess json data.
-    #   Input: A path to the conversation data
-    #   Output: Preprocessed Pandas DataFrame with columns ['sender_name', 'timestamp_ms', 'content', 'reactions', 'date', 'datetime', 'month']
+    #   Input: A path to the conversation data, execution backend: 'pandas' (default) or 'polars'. The polars backend keeps the conversation
+    #          in a Polars DataFrame (Arrow memory) and runs the statistics in the multi-threaded Polars engine, see polars_functions.
+    #          All the functions of this module accept DataFrames of both backends and return the same results.
+    #   Output: Preprocessed DataFrame with columns ['sender_name', 'timestamp_ms', 'content', 'reactions', 'datetime', 'month']
     #
 
+    if backend not in BACKENDS:
+        raise ValueError("backend must be one of {}, got {!r}".format(BACKENDS, backend))
+
+    if backend == 'polars':
+        import polars_functions
+        return polars_functions.prepare_data(data_path)
+
     df = load_conversation(data_path)
     df = decode_data(df)
     df = convert_timestamps(df)
@@ -75,6 +119,21 @@ def prepare_data(data_path):
     return df
 
 
+def select_user_messages(df, user):
+
+    #
+    #   Select messages sent by a single user.
+    #   Input: Pandas DataFrame prepared by prepare_data function, user name
+    #   Output: Pandas DataFrame with the messages of the user
+    #
+
+    if is_polars(df):
+        import polars_functions
+        return polars_functions.select_user_messages(df, user)
+
+    return df.loc[df["sender_name"] == user]
+
+
 def load_stopwords(path):
     
     #
@@ -90,6 +149,37 @@ def load_stopwords(path):
     return stopwords
 
 
+@lru_cache(maxsize=None)
+def cached_stopwords(path):
+
+    #
+    #   Load the stopwords only once per path and keep them as a frozenset for fast lookups.
+    #   Input: A path to the stopwords.txt file
+    #   Output: frozenset of stopwords
+    #
+
+    return frozenset(load_stopwords(path))
+
+
+@lru_cache(maxsize=None)
+def word_tokenizer():
+
+    #
+    #   NLTK is slow to import, so it is only loaded when messages are tokenized for the first time.
+    #   The punkt models are downloaded on first use if they are missing.
+    #   Output: nltk word_tokenize function
+    #
+
+    import nltk
+
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt', quiet=True)
+
+    return nltk.word_tokenize
+
+
 def tokenize_messages(df, path_to_stopwords):
 
     #
@@ -101,7 +191,8 @@ def tokenize_messages(df, path_to_stopwords):
     messages = df['content'].to_numpy()
     tokenized_text = []
 
-    stopwords = load_stopwords(path_to_stopwords)
+    stopwords = cached_stopwords(path_to_stopwords)
+    word_tokenize = word_tokenizer()
 
     for msg in messages:
         if msg != 'nan':
@@ -123,6 +214,8 @@ def prepare_word_freq_distribution(tokenized_text, n=1):
 
     assert 0 < n <= 3, "n must be 1, 2 or 3"
 
+    from nltk import FreqDist, bigrams, trigrams
+
     if n == 1:
         freqDist = FreqDist(tokenized_text)
     elif n == 2:
@@ -136,6 +229,19 @@ def prepare_word_freq_distribution(tokenized_text, n=1):
 
 
 
+def most_common_value(values):
+
+    #
+    #   The most common value, ties are broken by the first occurrence. Both backends rank this way, so they pick the same value on a tie.
+    #   Input: iterable of values, e.g. a Pandas Series
+    #   Output: the most common value or None if there are no values
+    #
+
+    ranking = Counter(values).most_common(1)
+
+    return ranking[0][0] if ranking else None
+
+
 def received_reactions_stats(df):
 
     #
@@ -145,6 +251,10 @@ def received_reactions_stats(df):
     #   Output: Python dict with 3 reaction statistics: total number of reactions, most common reaction and the name of the user that reacted most often.
     #
 
+    if is_polars(df):
+        import polars_functions
+        return polars_functions.received_reactions_stats(df)
+
     if np.any(df["reactions"].dropna().to_numpy()):
         reactions = np.hstack(df["reactions"].dropna().to_numpy())
         total_reactions = len(reactions)
@@ -158,11 +268,8 @@ def received_reactions_stats(df):
         icons = pd.Series(icons).astype(str).str.encode('iso-8859-1').str.decode('utf-8') 
         reactors = pd.Series(reactors).astype(str).str.encode('iso-8859-1').str.decode('utf-8') 
 
-        icons_ranking = icons.value_counts()
-        reactors_ranking = reactors.value_counts()
-
-        favourite_icon_received = icons_ranking.index[0]
-        most_emotional = reactors_ranking.index[0]
+        favourite_icon_received = most_common_value(icons)
+        most_emotional = most_common_value(reactors)
 
     else:
         total_reactions = 0
@@ -203,6 +310,10 @@ def granted_reaction_stats_per_user(df):
     #              }
     #
 
+    if is_polars(df):
+        import polars_functions
+        return polars_functions.granted_reaction_stats_per_user(df)
+
     conversation_users = df['sender_name'].unique()
     collection_dict = {}
     result_dict = {}
@@ -232,13 +343,11 @@ def granted_reaction_stats_per_user(df):
         given_reactions = pd.Series(collection_dict[usr]["reactions"]).astype(str).str.encode('iso-8859-1').str.decode('utf-8') 
         users_to_give = pd.Series(collection_dict[usr]["receivers"])#.astype(str).str.encode('iso-8859-1').str.decode('utf-8') 
 
-        favourtite_reaction_given_ranking = given_reactions.value_counts()
-        favourite_users_ranking = users_to_give.value_counts()
         total_reactions_given = len(collection_dict[usr]["reactions"])
 
         result_dict[usr] = {
-                            "favourite_reaction_given" : favourtite_reaction_given_ranking.index[0],
-                            "favourite_user_to_give" : favourite_users_ranking.index[0],
+                            "favourite_reaction_given" : most_common_value(given_reactions),
+                            "favourite_user_to_give" : most_common_value(users_to_give),
                             "reactions_given" : total_reactions_given
                            }
                 
@@ -246,25 +355,130 @@ def granted_reaction_stats_per_user(df):
     return result_dict
 
 
-def get_conversation_stats(df):
-    
+def sorted_timestamps(df):
+
     #
-    #   A helper function that collects all useful statistics about the conversation.
-    #   Input: Pandas DataFrame in a form as created by prepare_data() function.
-    #   Output: Python dict with statistics: 
-    #            1. Total numer of messgaes
-    #            2. Average message length
-    #            3. The day when the most messages were sent
-    #            4. The number of messages sent on most busy day
-    #            5. First message sent in the conversation
-    #            6. The sender of the first message
-    #            7. Total number of reactions
-    #            8. Most common reaction in the conversation
-    #            9. The user which granted a reaction most often
+    #   Message timestamps (in miliseconds) of the DataFrame as a numpy int64 array, together with the order which sorts them.
+    #   Input: DataFrame created by prepare_data() with any backend
+    #   Output: tuple (sorted timestamps, indices which sort the messages by timestamp)
+    #
+
+    if is_polars(df):
+        timestamps = df['timestamp_ms'].to_numpy().astype(np.int64)
+    else:
+        timestamps = pd.to_numeric(df['timestamp_ms']).to_numpy(dtype=np.int64)
+
+    order = np.argsort(timestamps, kind='stable')
+
+    return timestamps[order], order
+
+
+def split_sessions(timestamps, session_gap_minutes=60):
+
+    #
+    #   Input: sorted numpy array of timestamps in miliseconds, idle gap (in minutes) which splits the sessions
+    #   Output: tuple (gaps between consecutive messages, boolean array marking the first message of every session)
+    #
+
+    gaps = np.diff(timestamps)
+    new_session = np.concatenate(([True], gaps > session_gap_minutes * 60 * 1000))
+
+    return gaps, new_session
+
+
+def longest_streak(timestamps):
+
+    #
+    #   Longest run of consecutive days with at least one message.
+    #   Input: non empty numpy array of timestamps in miliseconds
+    #   Output: tuple (length of the streak in days, the day it started as 'YYYY-MM-DD')
+    #
+
+    days = np.unique(timestamps // (24 * 60 * 60 * 1000))
+    breaks = np.flatnonzero(np.diff(days) != 1) + 1
+    run_starts = np.concatenate(([0], breaks))
+    run_lengths = np.diff(np.concatenate((run_starts, [len(days)])))
+    longest_run = np.argmax(run_lengths)
+
+    return run_lengths[longest_run], str(days[run_starts[longest_run]].astype('datetime64[D]'))
+
+
+def activity_timeline_stats(df, session_gap_minutes=60):
+
+    #
+    #   Timing statistics of the conversation: how fast users reply, how the conversation splits into sessions and who starts or ends them.
+    #   Everything is computed with a few vectorized NumPy passes over the messages sorted by timestamp_ms, there are no row level loops.
+    #   A session is a run of messages in which no silence is longer than session_gap_minutes. A reply is a message sent within a session
+    #   right after a message of a different user, its reply time is the silence that preceded it.
+    #   Input: Pandas DataFrame in a form as created by prepare_data() function, idle gap (in minutes) which splits the sessions.
+    #   Output: Python dict with statistics:
+    #            1. Median reply time in seconds per user (users who never replied are skipped)
+    #            2. Number of sessions started per user
+    #            3. Number of sessions ended per user
+    #            4. Total number of sessions
+    #            5. Longest streak of consecutive days with at least one message and the day it started
+    #
+
+    timestamps, order = sorted_timestamps(df)
+    senders = np.asarray(df['sender_name'].to_numpy(), dtype=str)
+    users, codes = np.unique(senders[order], return_inverse=True)
+
+    if len(timestamps) == 0:
+        return {
+                "median_reply_time" : {},
+                "sessions_started" : {},
+                "sessions_ended" : {},
+                "total_sessions" : 0,
+                "longest_streak_days" : 0,
+                "longest_streak_start" : None
+               }
+
+    gaps, new_session = split_sessions(timestamps, session_gap_minutes)
+
+    # Session boundaries: the first message of every session starts it, the message right before the next session start ends the previous one
+    starts = np.flatnonzero(new_session)
+    ends = np.concatenate((starts[1:] - 1, [len(timestamps) - 1]))
+    started = np.bincount(codes[starts], minlength=len(users))
+    ended = np.bincount(codes[ends], minlength=len(users))
+
+    # Reply times grouped per user: sort by (user, reply time) once and pick the middle elements of every group
+    is_reply = (codes[1:] != codes[:-1]) & ~new_session[1:]
+    reply_codes = codes[1:][is_reply]
+    reply_times = gaps[is_reply] / 1000
+    reply_order = np.lexsort((reply_times, reply_codes))
+    reply_times = reply_times[reply_order]
+    reply_counts = np.bincount(reply_codes, minlength=len(users))
+    group_starts = np.cumsum(reply_counts) - reply_counts
+    replied = reply_counts > 0
+    lower = reply_times[(group_starts + (reply_counts - 1) // 2)[replied]]
+    upper = reply_times[(group_starts + reply_counts // 2)[replied]]
+    median_reply = (lower + upper) / 2
+
+    streak_days, streak_start = longest_streak(timestamps)
+
+    result = {
+                "median_reply_time" : dict(zip(users[replied], np.round(median_reply, 1))),
+                "sessions_started" : dict(zip(users, started)),
+                "sessions_ended" : dict(zip(users, ended)),
+                "total_sessions" : len(starts),
+                "longest_streak_days" : streak_days,
+                "longest_streak_start" : streak_start
+             }
+
+    return result
+
+
+def message_stats(df):
+
+    #
+    #   Statistics of the messages and the reactions they received, shared by get_conversation_stats() and get_stats_per_user().
+    #   Input: Pandas DataFrame in a form as created by prepare_data() function (the whole conversation or the messages of a single user).
+    #   Output: Python dict with statistics 1. - 9. of get_conversation_stats()
     #
 
     reaction_stats = received_reactions_stats(df)
-    messgaes_daily = df.groupby(df['datetime'].dt.date).size().reset_index(name='counts').sort_values(by=['counts'], ascending=False).reset_index()
+    # The groupby sorts the days and the stable sort keeps them in that order, so the earliest day wins a tie
+    messgaes_daily = df.groupby(df['datetime'].dt.date).size().reset_index(name='counts').sort_values(by=['counts'], ascending=False, kind='stable').reset_index()
     sorted_messages = df.loc[df['content'] != 'nan'].sort_values(by=['timestamp_ms']).reset_index()
 
     msg_lengths = [len(re.findall(r'\w+', i)) for i in sorted_messages['content'].to_numpy()]
@@ -281,6 +495,40 @@ def get_conversation_stats(df):
                     "most_emotional_user" : reaction_stats["most_reactions_received"]
                    }
     return result_stats
+
+
+def get_conversation_stats(df):
+    
+    #
+    #   A helper function that collects all useful statistics about the conversation.
+    #   Input: Pandas DataFrame in a form as created by prepare_data() function.
+    #   Output: Python dict with statistics: 
+    #            1. Total numer of messgaes
+    #            2. Average message length
+    #            3. The day when the most messages were sent
+    #            4. The number of messages sent on most busy day
+    #            5. First message sent in the conversation
+    #            6. The sender of the first message
+    #            7. Total number of reactions
+    #            8. Most common reaction in the conversation
+    #            9. The user which granted a reaction most often
+    #           10. Number of conversation sessions
+    #           11. The user who started the most sessions
+    #           12. Longest streak of consecutive active days
+    #
+
+    if is_polars(df):
+        import polars_functions
+        return polars_functions.get_conversation_stats(df)
+
+    result_stats = message_stats(df)
+    timeline_stats = activity_timeline_stats(df)
+
+    result_stats["total_sessions"] = timeline_stats["total_sessions"]
+    result_stats["top_session_starter"] = max(timeline_stats["sessions_started"], key=timeline_stats["sessions_started"].get)
+    result_stats["longest_streak_days"] = timeline_stats["longest_streak_days"]
+
+    return result_stats
     
 
 
@@ -288,21 +536,36 @@ def get_stats_per_user(df):
 
     #
     #   Collect all statistics per user and wrap them into a Pandas Dataframe.
+    #   The sessions and the streak of a user are counted on their own messages only, reply times and session starts/ends come from the whole conversation.
     #   Input: Pandas DataFrame in a form as created by prepare_data() function.
-    #   Output: Pandas Dataframe where index is the user and columns are statistics returned by get_conversation_stats().
+    #   Output: Pandas Dataframe where index is the user and columns are statistics returned by get_conversation_stats() (except the top session starter),
+    #           reaction statistics of the user and their reply time and session statistics.
     #
 
+    if is_polars(df):
+        import polars_functions
+        return polars_functions.get_stats_per_user(df)
+
     conversation_users = df['sender_name'].unique()
     output_dict = {}
     granted_reaction_stats = granted_reaction_stats_per_user(df)
+    timeline_stats = activity_timeline_stats(df)
 
     for user in conversation_users:
 
         user_messages_df = df.loc[df["sender_name"] == user]
-        user_stats = get_conversation_stats(user_messages_df)
+        user_timestamps, _ = sorted_timestamps(user_messages_df)
+        _, user_sessions = split_sessions(user_timestamps)
+
+        user_stats = message_stats(user_messages_df)
+        user_stats["total_sessions"] = np.count_nonzero(user_sessions)
+        user_stats["longest_streak_days"] = longest_streak(user_timestamps)[0]
         user_stats["favourtie_reaction_given"] = granted_reaction_stats[user]['favourite_reaction_given']
         user_stats['favourite_user_to_give_to'] = granted_reaction_stats[user]['favourite_user_to_give']
         user_stats["total_reactions_given_to_others"] = granted_reaction_stats[user]['reactions_given']
+        user_stats["median_reply_time"] = timeline_stats["median_reply_time"].get(user, np.nan)
+        user_stats["sessions_started"] = timeline_stats["sessions_started"][user]
+        user_stats["sessions_ended"] = timeline_stats["sessions_ended"][user]
         output_dict[user] = user_stats
 
     result = pd.DataFrame.from_dict(output_dict, orient='index')
@@ -329,6 +592,8 @@ def get_badges(df):
         - Storyteller: The top 3 individuals with the highest average message length.
         - Entertainer: The top 3 individuals with the highest ratio of total reactions to total messages.
         - Sensitivist: The top 3 individuals with the highest total number of reactions given to others.
+        - Sprinter: The top 3 individuals with the shortest median reply time (in seconds).
+        - Icebreaker: The top 3 individuals who started the most conversation sessions.
         
         The function creates a dictionary with the category names as keys and a list of top performers (formatted as "<performer> - <value>") as values. The resulting dictionary is returned.
     """
@@ -337,12 +602,191 @@ def get_badges(df):
     Storyteller = df["avg_message_length"].sort_values(ascending=False)[:3].reset_index()
     Entertainer = (df["total_reactions"] / df["total_messages"]).sort_values(ascending=False)[:3]
     Sensitivist = df["total_reactions_given_to_others"].sort_values(ascending=False)[:3].reset_index()
+    Sprinter = df["median_reply_time"].dropna().sort_values(ascending=True)[:3]
+    Icebreaker = df["sessions_started"].sort_values(ascending=False)[:3]
     
     result = {"Messenger" : [str(Messenger.loc[i,:]["index"]) + " - " + str(Messenger.loc[i,:]["total_messages"]) for i in range(3)],
               "Storyteller" : [str(Storyteller.loc[i,:]["index"]) + " - " + str(Storyteller.loc[i,:]["avg_message_length"]) for i in range(3)],
               "Entertainer" : [i + " - " + str(np.round(Entertainer.loc[i], 2)) for i in Entertainer.index],
-              "Sensitivist" : [str(Sensitivist.loc[i,:]["index"]) + " - " + str(Sensitivist.loc[i,:]["total_reactions_given_to_others"]) for i in range(3)]
+              "Sensitivist" : [str(Sensitivist.loc[i,:]["index"]) + " - " + str(Sensitivist.loc[i,:]["total_reactions_given_to_others"]) for i in range(3)],
+              "Sprinter" : [i + " - " + str(Sprinter.loc[i]) + "s" for i in Sprinter.index],
+              "Icebreaker" : [i + " - " + str(Icebreaker.loc[i]) for i in Icebreaker.index]
 
     }
 
     return result
+
+
+
+def explode_reactions(df):
+
+    #
+    #   Flatten the reactions column into one row per reaction.
+    #   Input: Pandas DataFrame in a form as created by prepare_data() function.
+    #   Output: Pandas DataFrame with columns ['receiver', 'actor', 'reaction'] where receiver is the sender of the message which got the reaction
+    #
+
+    if is_polars(df):
+        import polars_functions
+        return polars_functions.explode_reactions(df)
+
+    reactions = df[['sender_name', 'reactions']].explode('reactions').dropna(subset=['reactions'])
+    reactions = reactions.loc[reactions['reactions'].map(lambda r: isinstance(r, dict)).astype(bool)]
+
+    result = pd.DataFrame({
+                            "receiver" : reactions['sender_name'].to_numpy(),
+                            "actor" : [r['actor'] for r in reactions['reactions']],
+                            "reaction" : [r['reaction'] for r in reactions['reactions']]
+                          })
+
+    for col in ['actor', 'reaction']:
+        result[col] = result[col].astype(str).str.encode('iso-8859-1').str.decode('utf-8')
+
+    return result
+
+
+def empty_summary():
+
+    #
+    #   An empty summary, the neutral element of merge_summaries().
+    #
+
+    return {
+            "total_conversations" : 0,
+            "skipped_conversations" : [],
+            "messages_per_sender" : Counter(),
+            "messages_per_day" : Counter(),
+            "reactions_given" : Counter(),
+            "reactions_received" : Counter(),
+            "reaction_icons" : Counter(),
+            "token_freq" : Counter()
+           }
+
+
+def summarize_conversation(df, path_to_stopwords=None):
+
+    #
+    #   Reduce the conversation to a small mergeable summary. Summaries of many conversations can be combined with merge_summaries()
+    #   without keeping their DataFrames in memory, so the statistics of the whole inbox are computed map-reduce style.
+    #   Input: Pandas DataFrame in a form as created by prepare_data() function, path to stopwords text file (None skips the word counts,
+    #          which are the slowest part as they need tokenization).
+    #   Output: Python dict with the number of conversations, a list of conversation folders which could not be read and Counters: messages per sender, messages per day (YYYY-MM-DD),
+    #           reactions given per user, reactions received per user, reaction icons and token frequencies.
+    #
+
+    if is_polars(df):
+        import polars_functions
+        return polars_functions.summarize_conversation(df, path_to_stopwords)
+
+    summary = empty_summary()
+    summary["total_conversations"] = 1
+
+    # Counters are filled in the order of the first occurrence, so Counter.most_common() breaks ties the same way in both backends
+    summary["messages_per_sender"].update(df['sender_name'].tolist())
+    summary["messages_per_day"].update(df['datetime'].dt.strftime('%Y-%m-%d').tolist())
+
+    reactions = explode_reactions(df)
+    summary["reactions_given"].update(reactions['actor'].tolist())
+    summary["reactions_received"].update(reactions['receiver'].tolist())
+    summary["reaction_icons"].update(reactions['reaction'].tolist())
+
+    if path_to_stopwords is not None:
+        summary["token_freq"].update(tokenize_messages(df, path_to_stopwords))
+
+    return summary
+
+
+def merge_summaries(total, summary):
+
+    #
+    #   Add a conversation summary to the running total. The merge is associative and commutative, so the summaries can be reduced in any order.
+    #   Input: two summaries created by summarize_conversation() or empty_summary(), the first one is updated in place.
+    #   Output: the updated total summary
+    #
+
+    for key, value in summary.items():
+        if isinstance(value, Counter):
+            total[key].update(value)
+        else:
+            total[key] += value
+
+    return total
+
+
+def summarize_conversation_folder(path, path_to_stopwords=None, backend='pandas'):
+
+    #
+    #   Load a conversation folder and return its summary. Used as the map step of summarize_inbox().
+    #   A folder which cannot be read (missing or unreadable files, invalid json, no "messages" key) does not stop the whole inbox:
+    #   it is reported on stderr and recorded in "skipped_conversations". Other errors are propagated.
+    #   Input: A path to the conversation data, path to stopwords text file (optional), execution backend (see prepare_data())
+    #   Output: summary dict, see summarize_conversation()
+    #
+
+    try:
+        df = prepare_data(path, backend=backend)
+    except (OSError, ValueError, KeyError) as e: # json.JSONDecodeError and UnicodeDecodeError are ValueErrors
+        print("Skipping conversation {}: {}: {}".format(path, type(e).__name__, e), file=sys.stderr)
+        summary = empty_summary()
+        summary["skipped_conversations"].append(path)
+        return summary
+
+    return summarize_conversation(df, path_to_stopwords)
+
+
+def summarize_inbox(inbox_path, path_to_stopwords=None, max_workers=None, backend='pandas'):
+
+    #
+    #   Summarize all conversations of the inbox in parallel and merge the results. Each worker process loads one conversation at a time
+    #   and only the summaries travel back, so memory stays bounded by the biggest conversation and the vocabulary size.
+    #   Input: A path to the inbox, exmpl: "facebook-data\messages\inbox", path to stopwords text file (optional),
+    #          number of worker processes (default: number of CPUs, 1 runs everything in this process), execution backend (see prepare_data()).
+    #   Output: merged summary dict, see summarize_conversation()
+    #
+
+    conversation_paths = []
+
+    for entry in sorted(os.scandir(inbox_path), key=lambda e: e.name):
+        if entry.is_dir() and any(f.endswith('.json') for f in os.listdir(entry.path)):
+            conversation_paths.append(entry.path)
+
+    if max_workers == 1:
+        summaries = (summarize_conversation_folder(path, path_to_stopwords, backend) for path in conversation_paths)
+        return reduce(merge_summaries, summaries, empty_summary())
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        summaries = executor.map(summarize_conversation_folder, conversation_paths, [path_to_stopwords] * len(conversation_paths), [backend] * len(conversation_paths))
+        return reduce(merge_summaries, summaries, empty_summary())
+
+
+def get_inbox_stats(summary, n=10):
+
+    #
+    #   Turn a (merged) summary into inbox-wide statistics.
+    #   Input: summary dict created by summarize_inbox(), summarize_conversation() or merge_summaries(), number of top entries to return.
+    #   Output: Python dict with statistics:
+    #            1. Total number of conversations and the conversation folders which were skipped because they could not be read
+    #            2. Total number of messages
+    #            3. Top n most active contacts with their number of messages
+    #            4. The day when the most messages were sent and the number of messages on that day
+    #            5. Total number of reactions, most common reaction and top n users giving reactions
+    #            6. Top n most common words (empty if the summary was created without stopwords)
+    #
+
+    most_busy_day = summary["messages_per_day"].most_common(1)
+    most_common_reaction = summary["reaction_icons"].most_common(1)
+
+    result_stats = {
+                    "total_conversations" : summary["total_conversations"],
+                    "skipped_conversations" : summary["skipped_conversations"],
+                    "total_messages" : sum(summary["messages_per_sender"].values()),
+                    "most_active_contacts" : summary["messages_per_sender"].most_common(n),
+                    "most_busy_day" : most_busy_day[0][0] if most_busy_day else None,
+                    "messgaes_on_most_busy_day" : most_busy_day[0][1] if most_busy_day else 0,
+                    "total_reactions" : sum(summary["reaction_icons"].values()),
+                    "most_common_reaction" : most_common_reaction[0][0] if most_common_reaction else None,
+                    "top_reaction_givers" : summary["reactions_given"].most_common(n),
+                    "top_words" : summary["token_freq"].most_common(n)
+                   }
+
+    return result_stats
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+
+from processing_functions import prepare_data, activity_timeline_stats, longest_streak, get_stats_per_user
+
+START = 1654041600000 # 2022-06-01 00:00 UTC
+MINUTE = 60 * 1000
+DAY = 24 * 60 * MINUTE
+
+# (sender, minutes after START)
+MESSAGES = [
+            ("A", 0),
+            ("B", 1),        # B replies after 60s
+            ("A", 3),        # A replies after 120s
+            ("B", 6),        # B replies after 180s
+            ("A", 16),       # A replies after 600s
+            ("B", 17),       # B replies after 60s
+            ("A", 77),       # silence of exactly 60 minutes does not split the session, A replies after 3600s
+            ("C", 200),      # new session started by C, not a reply
+            ("C", 200.5),    # same sender, not a reply
+            ("A", 201),      # A replies after 30s
+            ("C", 261 + 1 / MINUTE), # silence of 60 minutes and 1ms starts a new session
+           ]
+
+
+def write_conversation(tmp_path, messages):
+
+    # Facebook exports the newest messages first
+    conversation = {"messages": [{"sender_name": sender, "timestamp_ms": int(START + minutes * MINUTE), "content": "message {}".format(i)}
+                                 for i, (sender, minutes) in reversed(list(enumerate(messages)))]}
+    (tmp_path / "message_1.json").write_text(json.dumps(conversation), encoding="utf-8")
+
+    return prepare_data(str(tmp_path))
+
+
+def test_reply_times_and_sessions(tmp_path):
+
+    stats = activity_timeline_stats(write_conversation(tmp_path, MESSAGES))
+
+    # A: 30, 120, 600, 3600 (even count), B: 60, 60, 180 (odd count), C never replies
+    assert stats["median_reply_time"] == {"A": 360.0, "B": 60.0}
+    assert stats["total_sessions"] == 3
+    assert stats["sessions_started"] == {"A": 1, "B": 0, "C": 2}
+    assert stats["sessions_ended"] == {"A": 2, "B": 0, "C": 1}
+    assert stats["longest_streak_days"] == 1
+    assert stats["longest_streak_start"] == "2022-06-01"
+
+
+def test_longest_streak():
+
+    timestamps = START + np.array([0, 1, 2, 5, 6, 6]) * DAY + 5 * MINUTE
+
+    assert longest_streak(timestamps) == (3, "2022-06-01")
+    assert longest_streak(timestamps[3:]) == (2, "2022-06-06")
+
+
+def test_sessions_per_user_counted_on_own_messages(tmp_path):
+
+    user_stats = get_stats_per_user(write_conversation(tmp_path, MESSAGES))
+
+    # A writes at 0, 3, 16, 77 and 201 minutes: silences of 61 and 124 minutes split the messages into 3 sessions
+    assert user_stats.loc["A", "total_sessions"] == 3
+    assert user_stats.loc["C", "total_sessions"] == 2
+    assert user_stats.loc["B", "median_reply_time"] == 60.0
+    assert "top_session_starter" not in user_stats.columns
@@ -0,0 +1,59 @@
+import os
+import time
+
+from PIL import Image
+
+from cache_functions import render_key, cache_lookup, cache_store, load_cached_image, store_cached_image
+
+ENTRY_SIZE = 1000
+
+
+def make_file(path, fill):
+
+    with open(path, "wb") as file:
+        file.write(bytes([fill]) * ENTRY_SIZE)
+
+    return str(path)
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path, monkeypatch):
+
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("FB_ANALYZER_CACHE_DIR", str(cache))
+    monkeypatch.setenv("FB_ANALYZER_CACHE_MAX_MB", str(3.5 * ENTRY_SIZE / (1024 * 1024))) # room for 3 entries
+
+    keys = [render_key("test", 1, i) for i in range(4)]
+    past = time.time() - 100
+
+    for i, key in enumerate(keys[:3]):
+        cache_store(key, make_file(tmp_path / "image_{}.png".format(i), i))
+        os.utime(cache / (key + ".png"), (past + i, past + i))
+
+    # Reading the oldest entry makes it the most recently used one, so the second entry is evicted instead
+    assert cache_lookup(keys[0], str(tmp_path / "copy.png"))
+    assert (tmp_path / "copy.png").read_bytes() == bytes([0]) * ENTRY_SIZE
+
+    cache_store(keys[3], make_file(tmp_path / "image_3.png", 3))
+
+    assert sorted(os.listdir(cache)) == sorted(key + ".png" for key in [keys[0], keys[2], keys[3]])
+    assert not cache_lookup(keys[1], str(tmp_path / "copy.png"))
+
+
+def test_empty_cache_dir_disables_the_cache(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("FB_ANALYZER_CACHE_DIR", "")
+
+    key = render_key("test", 1, "text")
+    cache_store(key, make_file(tmp_path / "image.png", 0))
+    store_cached_image(key, Image.new("RGBA", (4, 4)))
+
+    assert not cache_lookup(key, str(tmp_path / "copy.png"))
+    assert load_cached_image(key) is None
+    assert os.listdir(tmp_path) == ["image.png"]
+
+
+def test_render_key_depends_on_version_and_name():
+
+    assert render_key("plot", 1, "data") != render_key("plot", 2, "data")
+    assert render_key("plot_functions.plot", 1, "data") != render_key("pdf_builder_functions.plot", 1, "data")
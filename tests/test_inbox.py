@@ -0,0 +1,85 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import processing_functions
+from conftest import REPO_ROOT
+from processing_functions import summarize_inbox, get_inbox_stats
+
+EXAMPLE = os.path.join(REPO_ROOT, "examples", "message_1.json")
+
+
+def make_inbox(tmp_path):
+
+    #
+    #   Inbox with the example conversation, a copy of it without any reactions and a folder with a broken json file.
+    #
+
+    inbox = tmp_path / "inbox"
+    for name in ["with_reactions", "without_reactions", "broken"]:
+        (inbox / name).mkdir(parents=True)
+
+    shutil.copy(EXAMPLE, inbox / "with_reactions" / "message_1.json")
+
+    with open(EXAMPLE, encoding="utf-8") as file:
+        conversation = json.load(file)
+    for message in conversation["messages"]:
+        message.pop("reactions", None)
+    with open(inbox / "without_reactions" / "message_1.json", "w", encoding="utf-8") as file:
+        json.dump(conversation, file)
+
+    (inbox / "broken" / "message_1.json").write_text("{not json", encoding="utf-8")
+
+    return str(inbox)
+
+
+def test_inbox_with_conversation_without_reactions(tmp_path):
+
+    stats = get_inbox_stats(summarize_inbox(make_inbox(tmp_path), max_workers=1))
+
+    assert stats["total_conversations"] == 2
+    assert stats["total_messages"] == 2 * 185
+    assert stats["total_reactions"] == 20
+    assert [os.path.basename(path) for path in stats["skipped_conversations"]] == ["broken"]
+
+
+def test_conversation_without_messages_key_is_skipped(tmp_path):
+
+    inbox = make_inbox(tmp_path)
+    (tmp_path / "inbox" / "broken" / "message_1.json").write_text('{"participants": []}', encoding="utf-8")
+
+    stats = get_inbox_stats(summarize_inbox(inbox, max_workers=1))
+
+    assert [os.path.basename(path) for path in stats["skipped_conversations"]] == ["broken"]
+
+
+def test_errors_in_summary_code_are_not_swallowed(tmp_path, monkeypatch):
+
+    def broken_summary(df, path_to_stopwords=None):
+        raise TypeError("bug in the summary code")
+
+    monkeypatch.setattr(processing_functions, "summarize_conversation", broken_summary)
+
+    with pytest.raises(TypeError):
+        summarize_inbox(make_inbox(tmp_path), max_workers=1)
+
+
+def test_summary_counters_keep_first_occurrence_order(tmp_path):
+
+    # Facebook stores every UTF-8 byte as a separate character
+    def fb(text):
+        return text.encode("utf-8").decode("latin-1")
+
+    reactions = [["👍"], ["❤", "❤"], ["👍"]]
+    conversation = {"messages": [{"sender_name": sender, "timestamp_ms": 1656096449576 + i * 1000, "content": "message",
+                                  "reactions": [{"reaction": fb(icon), "actor": "C"} for icon in icons]}
+                                 for i, (sender, icons) in enumerate(zip(["B", "A", "A"], reactions))]}
+    (tmp_path / "message_1.json").write_text(json.dumps(conversation), encoding="utf-8")
+
+    summary = processing_functions.summarize_conversation(processing_functions.prepare_data(str(tmp_path)))
+
+    assert list(summary["reaction_icons"]) == ["👍", "❤"]
+    assert list(summary["messages_per_sender"]) == ["B", "A"]
+    assert get_inbox_stats(summary)["most_common_reaction"] == "👍"
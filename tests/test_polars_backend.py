@@ -0,0 +1,120 @@
+import json
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("polars")
+
+import processing_functions
+from polars_functions import fix_mojibake
+
+
+def test_fix_mojibake_decodes_escaped_utf8_bytes():
+
+    assert json.loads(fix_mojibake(b'{"c": "Ko\\u00c5\\u009bcielniak"}')) == {"c": "Kościelniak"}
+
+
+def test_fix_mojibake_keeps_escaped_backslash():
+
+    # A literal "\u00e9" in a message (e.g. a pasted Windows path) is stored with an escaped backslash
+    raw = b'{"content": "path C:\\\\u00e9x", "other": "\\\\\\\\\\u00c5\\u009b"}'
+
+    assert json.loads(fix_mojibake(raw)) == {"content": "path C:\\u00e9x", "other": "\\\\ś"}
+
+
+def test_literal_escape_in_message_matches_pandas(tmp_path):
+
+    conversation = {"messages": [{"sender_name": "A", "timestamp_ms": 1656096449576, "content": "path C:\\u00e9x"},
+                                 {"sender_name": "B", "timestamp_ms": 1656096459576, "content": "ok"}]}
+    (tmp_path / "message_1.json").write_text(json.dumps(conversation), encoding="utf-8")
+
+    expected = processing_functions.get_conversation_stats(processing_functions.prepare_data(str(tmp_path)))
+    result = processing_functions.get_conversation_stats(processing_functions.prepare_data(str(tmp_path), backend="polars"))
+
+    assert result == expected
+    assert result["first_message"] == "path C:\\u00e9x"
+
+
+def test_inbox_summary_matches_pandas(tmp_path):
+
+    from test_inbox import make_inbox
+
+    inbox = make_inbox(tmp_path)
+    expected = processing_functions.get_inbox_stats(processing_functions.summarize_inbox(inbox, max_workers=1))
+    result = processing_functions.get_inbox_stats(processing_functions.summarize_inbox(inbox, max_workers=1, backend="polars"))
+
+    assert result == expected
+
+
+def test_ties_are_broken_the_same_way_as_pandas(tmp_path):
+
+    # Facebook stores every UTF-8 byte as a separate character
+    def fb(text):
+        return text.encode("utf-8").decode("latin-1")
+
+    # (sender, day, reactions): every ranking is a tie, the first occurrence wins. Eve reacts without being a participant.
+    messages = [
+                ("B", 0, [("😮", "Eve"), ("👍", "A")]),
+                ("A", 0, [("❤", "C")]),
+                ("C", 1, [("👍", "Eve"), ("❤", "A")]),
+                ("A", 1, [("😮", "C")]),
+                ("B", 2, []),
+                ("C", 2, [])
+               ]
+    conversation = {"messages": [{"sender_name": sender, "timestamp_ms": 1656096449576 + day * 86400000 + i * 1000, "content": "message {}".format(i),
+                                  "reactions": [{"reaction": fb(icon), "actor": actor} for icon, actor in reactions]}
+                                 for i, (sender, day, reactions) in enumerate(messages)]}
+    (tmp_path / "message_1.json").write_text(json.dumps(conversation), encoding="utf-8")
+
+    df = processing_functions.prepare_data(str(tmp_path))
+    polars_df = processing_functions.prepare_data(str(tmp_path), backend="polars")
+
+    stats = processing_functions.get_conversation_stats(df)
+    assert (stats["most_common_reaction"], stats["most_emotional_user"], stats["most_busy_day"]) == ("😮", "Eve", "2022-06-24")
+    assert processing_functions.get_conversation_stats(polars_df) == stats
+
+    user_stats = processing_functions.get_stats_per_user(df)
+    assert tuple(user_stats.loc["B", ["most_common_reaction", "most_emotional_user"]]) == ("😮", "Eve")
+    assert tuple(user_stats.loc["A", ["favourtie_reaction_given", "favourite_user_to_give_to"]]) == ("👍", "B")
+    pd.testing.assert_frame_equal(processing_functions.get_stats_per_user(polars_df), user_stats, check_dtype=False)
+
+    # Counter equality ignores the order, which decides the ties of Counter.most_common() after merging summaries
+    summary = processing_functions.summarize_conversation(df)
+    polars_summary = processing_functions.summarize_conversation(polars_df)
+    for key, value in summary.items():
+        if isinstance(value, Counter):
+            assert list(polars_summary[key].items()) == list(value.items()), key
+
+
+def test_wide_ties_are_broken_the_same_way_as_pandas(tmp_path):
+
+    # A count pattern on which an unstable sort (as in value_counts()) does not keep the first of the two maxima in front
+    counts = [1, 2, 1, 1, 2, 2, 2, 1, 1, 1, 1, 3, 2, 2, 1, 2, 3]
+
+    # counts[k] messages on day k, each with one reaction of actor U<k>
+    days = [day for day, count in enumerate(counts) for _ in range(count)]
+    conversation = {"messages": [{"sender_name": "AB"[i % 2], "timestamp_ms": 1656096449576 + day * 86400000 + i * 1000, "content": "message {}".format(i),
+                                  "reactions": [{"reaction": "👍".encode("utf-8").decode("latin-1"), "actor": "U{:02d}".format(day)}]}
+                                 for i, day in enumerate(days)]}
+    (tmp_path / "message_1.json").write_text(json.dumps(conversation), encoding="utf-8")
+
+    stats = processing_functions.get_conversation_stats(processing_functions.prepare_data(str(tmp_path)))
+
+    assert (stats["most_emotional_user"], stats["most_busy_day"], stats["messgaes_on_most_busy_day"]) == ("U11", "2022-07-05", 3)
+    assert processing_functions.get_conversation_stats(processing_functions.prepare_data(str(tmp_path), backend="polars")) == stats
+
+
+def test_text_which_is_not_utf8_is_left_undecoded_as_in_pandas(tmp_path):
+
+    # ÿ is not a valid UTF-8 byte, so the content column cannot be decoded, while the sender names still are
+    raw = ('{"messages": [{"sender_name": "Ko\\u00c5\\u009bcielniak", "timestamp_ms": 1656096449576, "content": "Ko\\u00c5\\u009b \\u00ff",'
+           ' "reactions": [{"reaction": "\\u00f0\\u009f\\u0091\\u008d", "actor": "B"}]},'
+           ' {"sender_name": "B", "timestamp_ms": 1656096459576, "content": "ok"}]}')
+    (tmp_path / "message_1.json").write_text(raw, encoding="utf-8")
+
+    expected = processing_functions.get_conversation_stats(processing_functions.prepare_data(str(tmp_path)))
+    result = processing_functions.get_conversation_stats(processing_functions.prepare_data(str(tmp_path), backend="polars"))
+
+    assert result == expected
+    assert (result["first_message_sender"], result["first_message"], result["most_common_reaction"]) == ("Kościelniak", "KoÅ\u009b ÿ", "👍")